@@ -1,55 +1,431 @@
-import time, mmap, math
+import os, time, mmap, math, ctypes, errno
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from multiprocessing import get_context
 from tempfile import NamedTemporaryFile
+from threading import Thread
+
+from native import load_native, load_spin, spin_rate
 
 from metaflow import (
     FlowSpec,
     step,
     resources,
-    parallel_map,
     Parameter,
+    pypi,
     pypi_base,
     catch,
     retry
 )
 
+# mmap.MAP_NORESERVE is only exported by Python 3.13+
+MAP_NORESERVE = getattr(mmap, "MAP_NORESERVE", 0x4000)
+MAP_FAILED = ctypes.c_void_p(-1).value
+
+# when _make_file calls fsync, or fdatasync for per_write_data
+SYNC_MODES = ("none", "per_write", "per_write_data", "per_file")
+
+# work slices per one-second window in spin_cpu_percentage
+SPIN_SLICES = 100
+
+# write sizes swept by io_write_sweep
+SWEEP_CHUNK_SIZES = (4 << 10, 64 << 10, 1 << 20, 4 << 20, 16 << 20)
+
 
 def load_libc():
     from ctypes.util import find_library
-    from ctypes import cdll
     import ctypes
 
-    libc = cdll.LoadLibrary(find_library("c"))
+    libc = ctypes.CDLL(find_library("c"), use_errno=True)
     libc.malloc.argtypes = [ctypes.c_size_t]
     libc.malloc.restype = ctypes.c_void_p
     libc.free.argtypes = [ctypes.c_void_p]
     libc.memset.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_size_t]
     libc.memset.restype = ctypes.c_void_p
+    libc.mmap.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_long,
+    ]
+    libc.mmap.restype = ctypes.c_void_p
+    libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    libc.munmap.restype = ctypes.c_int
+    libc.madvise.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+    libc.madvise.restype = ctypes.c_int
     return libc
 
 
-def spin_cpu_percentage(seconds, percentage=100):
+@contextmanager
+def libc_mmap(size, flags=0):
+    """
+    Map `size` bytes of private anonymous memory with libc, adding `flags`
+    to the mmap flags, and yield its address. Unmaps on exit.
+    """
+    libc = load_libc()
+    flags |= mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS
+    prot = mmap.PROT_READ | mmap.PROT_WRITE
+    addr = libc.mmap(None, size, prot, flags, -1, 0)
+    if addr == MAP_FAILED:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    try:
+        yield addr
+    finally:
+        libc.munmap(addr, size)
+
+
+@contextmanager
+def nogil_mmap_fill(size, value, flags=0, advice=None):
+    """
+    Like libc_mmap, but fill the memory with the byte `value` first, after
+    passing `advice` to madvise if given. The fill is a single ctypes call,
+    which doesn't hold the GIL, so the heartbeat and monitoring threads
+    keep running meanwhile.
+    """
+    libc = load_libc()
+    with libc_mmap(size, flags) as addr:
+        if advice is not None and libc.madvise(addr, size, advice):
+            err = ctypes.get_errno()
+            print(f"madvise({advice}) failed, ignoring: {os.strerror(err)}")
+        libc.memset(addr, value, size)
+        yield addr
+
+
+def spin_cpu_percentage(seconds, percentage=100, mode="scalar"):
     """
     Utilize the CPU for the desired number of seconds at the desired percentage.
-    Number of seconds is truncated to the nearest integer.
+    Number of seconds is truncated to the nearest integer. `mode` selects the
+    native spin kernel, see native.SPIN_MODES.
     """
     seconds = int(seconds)
+    spin = load_spin(mode)
+    busy = percentage / 100.0
+    if spin is not None:
+        # the calibrated rate only sizes the slices, the clock ends the work,
+        # so windows stay on time when the cores are oversubscribed
+        work = max(1, int(spin_rate(spin) * busy / SPIN_SLICES))
+    # locals for the Python fallback loop, to keep lookups out of it
+    now, sqrt, k = time.monotonic, math.sqrt, 64**5
     print(f"Running at {percentage}% CPU Utilization for {seconds} seconds...")
+    run_start = now()
     for i in range(0, seconds):
-        start_time = time.time()
+        # windows are scheduled from the start of the run, so that a slice
+        # overshooting one window doesn't push back all the following ones
+        start_time = run_start + i
         if i % 10 == 0:
             print(f"Beginning work cycle {i}/{seconds} seconds...")
         # Perform work for the required percentage of this second
-        while (time.time() - start_time) < (percentage / 100.0):
-            a = math.sqrt(64 * 64 * 64 * 64 * 64)
+        if spin is not None:
+            while now() - start_time < busy:
+                spin(work)
+        else:
+            while now() - start_time < busy:
+                sqrt(k)
         # Sleep for the remainder of the second
-        time.sleep(1 - percentage / 100.0)
+        time.sleep(max(0.0, 1 - (now() - start_time)))
+    overrun = now() - run_start - seconds
+    if overrun > 0.1 * seconds + 1:
+        print(f"Warning: CPU spin overran its {seconds} seconds by {overrun:.1f}s")
+
+
+def spin_cpu_cores(cores, seconds, percentage=100, mode="scalar"):
+    """
+    Run spin_cpu_percentage on the desired number of cores in parallel.
+    The native kernels release the GIL, so threads are enough; the pure
+    Python fallback needs a process per core.
+    """
+    args = (seconds, percentage, mode)
+    spin = load_spin(mode)
+    if spin is None:
+        _spin_pool(cores).map(_spin_worker, [args] * cores)
+    else:
+        # calibrate once, before the threads compete for cores
+        spin_rate(spin)
+        threads = [Thread(target=spin_cpu_percentage, args=args) for _ in range(cores)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+
+@lru_cache(maxsize=None)
+def _spin_pool(processes):
+    """
+    Fork a process pool for spin_cpu_cores on first use and keep it for the
+    rest of the task.
+    """
+    return get_context("fork").Pool(processes)
+
+
+def _spin_worker(args):
+    spin_cpu_percentage(*args)
+
+
+@lru_cache(maxsize=None)
+def _ones(size):
+    """
+    Return a `size` byte buffer of ones, shared by all callers. It is backed
+    by an anonymous mmap filled with memset instead of a Python bytes object.
+    """
+    m = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE)
+    buf = ctypes.c_char.from_buffer(m)
+    load_libc().memset(ctypes.addressof(buf), ord("1"), size)
+    del buf
+    return memoryview(m)
+
+
+def _make_file(name, size_in_mb, chunk_size=16_000_000, sync="none", threads=1):
+    """
+    Write `size_in_mb` megabytes of ones to the file `name`, preallocating
+    it and writing `chunk_size` bytes per syscall. `sync` is one of
+    SYNC_MODES: never fsync, fsync or fdatasync after every write, or fsync
+    once at the end.
+    With `threads` > 1 the file is split into that many contiguous ranges
+    which are written concurrently.
+    """
+    fd = os.open(name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _rewrite_file(fd, size_in_mb, chunk_size, sync, threads)
+    finally:
+        os.close(fd)
+
+
+def _rewrite_file(fd, size_in_mb, chunk_size=16_000_000, sync="none", threads=1):
+    """
+    Truncate the open file `fd` and write it again as in _make_file.
+    """
+    if sync not in SYNC_MODES:
+        raise ValueError(f"Unknown sync mode '{sync}', use one of {list(SYNC_MODES)}")
+    size = size_in_mb * 1_000_000
+    buf = _ones(chunk_size)
+
+    def write(start, end):
+        for off in range(start, end, chunk_size):
+            _pwrite_all(fd, buf[: end - off], off)
+            if sync == "per_write":
+                os.fsync(fd)
+            elif sync == "per_write_data":
+                os.fdatasync(fd)
+
+    os.ftruncate(fd, 0)
+    os.lseek(fd, 0, os.SEEK_SET)
+    if size:
+        os.posix_fallocate(fd, 0, size)
+    # split into whole chunks per thread, so that writes stay chunk aligned
+    share = -(-size // threads)
+    share += -share % chunk_size
+    ranges = [(off, min(off + share, size)) for off in range(0, size, share or 1)]
+    if len(ranges) > 1:
+        with ThreadPoolExecutor(len(ranges)) as pool:
+            list(pool.map(lambda r: write(*r), ranges))
+    else:
+        write(0, size)
+    if sync == "per_file":
+        os.fsync(fd)
+
+
+def _pwrite_all(fd, buf, offset):
+    """
+    Write all of `buf` to `fd` at `offset`, resuming short writes where
+    they stopped.
+    """
+    view = memoryview(buf)
+    while view:
+        n = os.pwrite(fd, view, offset)
+        if not n:
+            raise OSError(errno.EIO, f"pwrite at offset {offset} wrote nothing")
+        view = view[n:]
+        offset += n
+
+
+def _writev_all(fd, bufs):
+    """
+    Write all of `bufs` to `fd` with vectored writes. Linux writes at most
+    ~2GB per syscall, so partial writes are resumed where they stopped.
+    """
+    views = [memoryview(b) for b in bufs]
+    while views:
+        n = os.writev(fd, views)
+        while views and n >= len(views[0]):
+            n -= len(views.pop(0))
+        if n:
+            views[0] = views[0][n:]
+
+
+def _make_file_direct(name, size_in_mb, chunk_size=1 << 20):
+    """
+    Like _make_file, but write past the page cache with O_DIRECT | O_SYNC.
+    The size is rounded up to whole chunks, as O_DIRECT requires aligned
+    writes. Falls back to an fsync per write if O_DIRECT isn't supported.
+    """
+    size = size_in_mb * 1_000_000
+    # _ones is mmap backed and so page aligned, as O_DIRECT requires
+    buf = _ones(chunk_size)
+    fd, direct = _open_direct(name)
+    try:
+        for off in range(0, size, chunk_size):
+            _pwrite_all(fd, buf, off)
+            if not direct:
+                os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _make_file_uring(name, size_in_mb, chunk_size=64 << 20, depth=128):
+    """
+    Like _make_file_direct, but submit the writes through io_uring, `depth`
+    at a time with one syscall per batch. Skipped if liburing isn't
+    installed or io_uring is blocked, e.g. by a container's seccomp profile.
+    """
+    try:
+        import liburing
+    except ImportError:
+        print("liburing not installed, skipping io_uring writes")
+        return
+    ring = liburing.Ring()
+    try:
+        liburing.io_uring_queue_init(depth, ring)
+    except OSError as ex:
+        print(f"io_uring not available ({ex}), skipping io_uring writes")
+        return
+    size = size_in_mb * 1_000_000
+    # keep a reference to the buffer for as long as the Iovec is in use
+    buf = _ones(chunk_size)
+    offsets = list(range(0, size, chunk_size))
+    fd = None
+    try:
+        iov = liburing.Iovec([buf])
+        cqe = liburing.Cqe()
+        fd, direct = _open_direct(name)
+        for i in range(0, len(offsets), depth):
+            batch = offsets[i : i + depth]
+            for off in batch:
+                sqe = liburing.io_uring_get_sqe(ring)
+                liburing.io_uring_prep_writev(sqe, fd, iov, off)
+            liburing.io_uring_submit_and_wait(ring, len(batch))
+            # reap one completion at a time: cqe[j] for j > 0 indexes past
+            # the CQ head without handling ring wrap-around
+            for _ in batch:
+                liburing.io_uring_wait_cqe(ring, cqe)
+                res = cqe[0].res
+                liburing.io_uring_cq_advance(ring, 1)
+                if res < 0:
+                    raise OSError(-res, os.strerror(-res))
+                if res != chunk_size:
+                    msg = f"short io_uring write of {res} of {chunk_size} bytes"
+                    raise OSError(errno.EIO, msg)
+        if not direct:
+            os.fsync(fd)
+    finally:
+        if fd is not None:
+            os.close(fd)
+        liburing.io_uring_queue_exit(ring)
+
+
+def _open_direct(name):
+    """
+    Open `name` for writing with O_DIRECT | O_SYNC. Returns the fd and
+    whether O_DIRECT is in effect: it's dropped on filesystems that reject
+    it, in which case callers need to fsync themselves.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    try:
+        return os.open(name, flags | os.O_DIRECT | os.O_SYNC, 0o644), True
+    except OSError as ex:
+        if ex.errno != errno.EINVAL:
+            raise
+        print("O_DIRECT not supported, writing through the page cache")
+        return os.open(name, flags, 0o644), False
+
+
+def _copy_file(src_name, dst_name, copies):
+    """
+    Write `copies` back-to-back copies of the file `src_name` to `dst_name`
+    without passing the data through user space. This uses sendfile rather
+    than copy_file_range, which may just share extents on reflink capable
+    filesystems (XFS, btrfs) and do no data IO at all.
+    """
+    size = os.path.getsize(src_name)
+    src = os.open(src_name, os.O_RDONLY)
+    dst = os.open(dst_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        for _ in range(copies):
+            off = 0
+            while off < size:
+                n = os.sendfile(dst, src, off, size - off)
+                if not n:
+                    msg = f"{src_name} ended at {off} of {size} bytes"
+                    raise OSError(errno.EIO, msg)
+                off += n
+    finally:
+        os.close(src)
+        os.close(dst)
+
+
+def _mem_flat(size, seconds, touch=True, advice=None):
+    """
+    Map `size` bytes of anonymous memory and sit on it for `seconds`. With
+    touch=False the memory is only reserved: it counts towards virtual but
+    not resident memory. `advice` is passed to madvise before touching.
+    """
+    if touch:
+        mapping = nogil_mmap_fill(size, 0x61, advice=advice)
+    else:
+        mapping = libc_mmap(size, MAP_NORESERVE)
+    with mapping:
+        _print_mem()
+        time.sleep(seconds)
+
+
+def _ramp_touch(m, seconds, batches=20):
+    """
+    Touch one byte per page of the mmap `m`, spread evenly over `seconds`,
+    so that resident memory grows linearly. Prints memory usage after each
+    of the `batches`.
+    """
+    lib = load_native()
+    size = len(m)
+    batch = -(-size // batches)
+    batch += -batch % mmap.PAGESIZE
+    buf = ctypes.c_char.from_buffer(m)
+    addr = ctypes.addressof(buf)
+    for off in range(0, size, batch):
+        n = min(batch, size - off)
+        if lib is not None:
+            lib.ramp_touch(addr + off, n, seconds / batches)
+        else:
+            for i in range(off, off + n, mmap.PAGESIZE):
+                m[i] = 66
+            time.sleep(seconds / batches)
+        _print_mem()
+    del buf
 
 
-def _make_file(name, size_in_mb):
-    x = b"1" * 1_000_000
-    with open(name, "wb") as f:
-        for i in range(size_in_mb):
-            f.write(x)
+def _touch_range(addr, size):
+    """
+    Make the `size` bytes of anonymous memory at `addr` resident, writing
+    one byte per page with the native kernels or all of them without.
+    """
+    lib = load_native()
+    if lib is not None:
+        lib.ramp_touch(addr, size, 0.0)
+    else:
+        load_libc().memset(addr, 0x61, size)
+
+
+def _touch_pages(mm, start, length):
+    """
+    Read one byte per page of the mmap `mm` in [start, start + length),
+    asking the kernel to read the range ahead first. Nothing is copied.
+    """
+    aligned = start - start % mmap.PAGESIZE
+    mm.madvise(mmap.MADV_WILLNEED, aligned, start + length - aligned)
+    with memoryview(mm) as mv:
+        return sum(mv[start : start + length : mmap.PAGESIZE])
 
 
 def _print_mem():
@@ -65,6 +441,11 @@ class MonitorBench(FlowSpec):
     spin_secs = Parameter(
         "step_time", help="Run each step for this many seconds", default=600
     )
+    spin_mode = Parameter(
+        "spin_mode",
+        help="CPU spin kernel: scalar, avx2 or avx512",
+        default="scalar",
+    )
     enable_oom = Parameter("enable_oom", is_flag=True, help="Set this flag to enable an OOM test", default=False)
 
     @step
@@ -87,7 +468,7 @@ class MonitorBench(FlowSpec):
         """
         One core, 100% utilized
         """
-        spin_cpu_percentage(self.spin_secs)
+        spin_cpu_percentage(self.spin_secs, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @resources(cpu=2)
@@ -96,7 +477,7 @@ class MonitorBench(FlowSpec):
         """
         Two cores, each 100% utilized
         """
-        parallel_map(lambda _: spin_cpu_percentage(self.spin_secs), [None] * 2)
+        spin_cpu_cores(2, self.spin_secs, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @resources(cpu=1)
@@ -105,7 +486,7 @@ class MonitorBench(FlowSpec):
         """
         One core, 50% utilized
         """
-        spin_cpu_percentage(self.spin_secs, percentage=50)
+        spin_cpu_percentage(self.spin_secs, percentage=50, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @resources(cpu=2)
@@ -114,9 +495,7 @@ class MonitorBench(FlowSpec):
         """
         Two cores, each 50% utilized
         """
-        parallel_map(
-            lambda _: spin_cpu_percentage(self.spin_secs, percentage=50), [None] * 2
-        )
+        spin_cpu_cores(2, self.spin_secs, percentage=50, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @resources(cpu=8)
@@ -125,7 +504,7 @@ class MonitorBench(FlowSpec):
         """
         Eight cores, each 100% utilized
         """
-        parallel_map(lambda _: spin_cpu_percentage(self.spin_secs), [None] * 8)
+        spin_cpu_cores(8, self.spin_secs, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @resources(cpu=4)
@@ -134,7 +513,7 @@ class MonitorBench(FlowSpec):
         """
         Eight cores, each 100% utilized, but only 4 cores requested
         """
-        parallel_map(lambda _: spin_cpu_percentage(self.spin_secs), [None] * 8)
+        spin_cpu_cores(8, self.spin_secs, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @step
@@ -143,7 +522,7 @@ class MonitorBench(FlowSpec):
         Unspecified CPU resources.  Expected to be Metaflow default.
         Also allocates the Metaflow default amount of memory for this step.
         """
-        spin_cpu_percentage(self.spin_secs)
+        spin_cpu_percentage(self.spin_secs, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @resources(cpu=0.5)
@@ -152,7 +531,7 @@ class MonitorBench(FlowSpec):
         """
         Fractional CPU resources requested.  Expected to be Metaflow default
         """
-        spin_cpu_percentage(self.spin_secs, percentage=50)
+        spin_cpu_percentage(self.spin_secs, percentage=50, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @resources(cpu=1)
@@ -162,7 +541,7 @@ class MonitorBench(FlowSpec):
         Increase CPU utilization in steps of 10%, ending at 100% utilization
         """
         for i in range(10):
-            spin_cpu_percentage(self.spin_secs / 10, i * 10)
+            spin_cpu_percentage(self.spin_secs / 10, i * 10, mode=self.spin_mode)
         self.next(self.cpu_join)
 
     @step
@@ -174,6 +553,8 @@ class MonitorBench(FlowSpec):
         self.next(
             self.mem_flat_2gb,
             self.mem_flat_8gb,
+            self.mem_flat_8gb_4k,
+            self.mem_flat_8gb_untouched,
             self.mem_staircase_8gb,
             self.mem_increasing_rss,
             self.mem_spike_2gb,
@@ -189,20 +570,34 @@ class MonitorBench(FlowSpec):
         """
         Allocate 2GB and sit on it
         """
-        t = b"a" * 2_000_000_000
-        _print_mem()
-        time.sleep(self.spin_secs)
+        _mem_flat(2_000_000_000, self.spin_secs)
         self.next(self.mem_join)
 
     @resources(memory=10000)
     @step
     def mem_flat_8gb(self):
         """
-        Allocate 8GB and sit on it
+        Allocate 8GB in transparent huge pages and sit on it
         """
-        t = b"a" * 8_000_000_000
-        _print_mem()
-        time.sleep(self.spin_secs)
+        _mem_flat(8_000_000_000, self.spin_secs, advice=mmap.MADV_HUGEPAGE)
+        self.next(self.mem_join)
+
+    @resources(memory=10000)
+    @step
+    def mem_flat_8gb_4k(self):
+        """
+        Allocate 8GB in 4KB pages and sit on it
+        """
+        _mem_flat(8_000_000_000, self.spin_secs, advice=mmap.MADV_NOHUGEPAGE)
+        self.next(self.mem_join)
+
+    @resources(memory=2000)
+    @step
+    def mem_flat_8gb_untouched(self):
+        """
+        Reserve 8GB without touching it and sit on it
+        """
+        _mem_flat(8_000_000_000, self.spin_secs, touch=False)
         self.next(self.mem_join)
 
     @resources(memory=10000)
@@ -211,25 +606,23 @@ class MonitorBench(FlowSpec):
         """
         Allocate 8GB in 0.5GB increments
         """
-        t = []
-        for i in range(16):
-            t.append(b"a" * 512_000_000)
-            _print_mem()
+        step_size = 512_000_000
+        with libc_mmap(16 * step_size) as addr:
+            for i in range(16):
+                _touch_range(addr + i * step_size, step_size)
+                _print_mem()
+                time.sleep(self.spin_secs / 17)
             time.sleep(self.spin_secs / 17)
-        time.sleep(self.spin_secs / 17)
         self.next(self.mem_join)
 
     @resources(memory=3000)
     @step
     def mem_increasing_rss(self):
         """
-        Make a 2GB allocation and fill it
+        Make a 2GB allocation and fill it page by page
         """
         m = mmap.mmap(-1, 2_000_000_000, flags=mmap.MAP_PRIVATE)
-        for i in range(2_000_000_000):
-            m[i] = 66
-            if not i % 10_000_000:
-                _print_mem()
+        _ramp_touch(m, self.spin_secs)
         time.sleep(10)
         m.close()
         self.next(self.mem_join)
@@ -241,13 +634,11 @@ class MonitorBench(FlowSpec):
         Spike a 2GB allocation for 10secs
         """
         time.sleep(self.spin_secs / 2)
-        c = load_libc()
-        p = c.malloc(2_000_000_000)
-        c.memset(p, 66, 2_000_000_000)
-        print("spike!")
-        _print_mem()
-        time.sleep(10)
-        c.free(p)
+        # MAP_POPULATE faults the whole allocation in with a single syscall
+        with libc_mmap(2_000_000_000, mmap.MAP_POPULATE):
+            print("spike!")
+            _print_mem()
+            time.sleep(10)
         print("after spike")
         _print_mem()
         time.sleep(self.spin_secs / 2)
@@ -300,12 +691,12 @@ class MonitorBench(FlowSpec):
                 B = int(1e9)
                 mm = mmap.mmap(f.fileno(), 0, flags=mmap.ACCESS_READ)
                 for i in range(num_gigs):
-                    b = str(mm[i * B : (i + 1) * B])
+                    _touch_pages(mm, i * B, B)
                     _print_mem()
                     time.sleep(1)
         self.next(self.mem_join)
 
-    @resources(memory=32000)
+    @resources(memory=10000)
     @step
     def mem_mmap_8gb_touch_all(self):
         """
@@ -316,10 +707,9 @@ class MonitorBench(FlowSpec):
             _make_file(tmp.name, num_gigs * 1000)
             with open(tmp.name, "r+b") as f:
                 mm = mmap.mmap(f.fileno(), 0, flags=mmap.ACCESS_READ)
-                x = str(mm[:])
+                _touch_pages(mm, 0, len(mm))
                 _print_mem()
                 time.sleep(self.spin_secs / 2)
-        x[0]
         self.next(self.mem_join)
 
     @step
@@ -328,7 +718,20 @@ class MonitorBench(FlowSpec):
 
     @step
     def start_io(self):
-        self.next(self.io_write_8gb, self.io_write_8gb_mixed_cpu)
+        self.next(
+            self.io_write_8gb,
+            self.io_write_8gb_fsync_per_write,
+            self.io_write_8gb_fsync_per_file,
+            self.io_write_8gb_parallel,
+            self.io_write_8gb_writev,
+            self.io_write_8gb_fdatasync,
+            self.io_write_sweep,
+            self.io_write_8gb_mixed_cpu,
+            self.io_write_churn,
+            self.io_write_8gb_odirect,
+            self.io_write_8gb_uring,
+            self.io_copyfile_8gb,
+        )
 
     @resources(memory=2000)
     @step
@@ -337,25 +740,156 @@ class MonitorBench(FlowSpec):
         Wait, write 8GB to a file, and wait
         """
         time.sleep(self.spin_secs / 2)
-        x = b"1" * 1_000_000_000
         num_gigs = 8
         with NamedTemporaryFile() as tmp:
             _make_file(tmp.name, num_gigs * 1000)
         time.sleep(self.spin_secs / 2)
         self.next(self.io_join)
 
+    @resources(memory=2000)
+    @step
+    def io_write_8gb_fsync_per_write(self):
+        """
+        Wait, write 8GB to a file with an fsync after every write, and wait
+        """
+        time.sleep(self.spin_secs / 2)
+        with NamedTemporaryFile() as tmp:
+            _make_file(tmp.name, 8000, sync="per_write")
+        time.sleep(self.spin_secs / 2)
+        self.next(self.io_join)
+
+    @resources(memory=2000)
+    @step
+    def io_write_8gb_fsync_per_file(self):
+        """
+        Wait, write 8GB to a file with one fsync before closing it, and wait
+        """
+        time.sleep(self.spin_secs / 2)
+        with NamedTemporaryFile() as tmp:
+            _make_file(tmp.name, 8000, sync="per_file")
+        time.sleep(self.spin_secs / 2)
+        self.next(self.io_join)
+
+    @resources(memory=2000)
+    @step
+    def io_write_8gb_parallel(self):
+        """
+        Wait, write 8GB to a file from 4 threads, and wait
+        """
+        time.sleep(self.spin_secs / 2)
+        with NamedTemporaryFile() as tmp:
+            _make_file(tmp.name, 8000, threads=4)
+        time.sleep(self.spin_secs / 2)
+        self.next(self.io_join)
+
+    @resources(memory=2000)
+    @step
+    def io_write_8gb_writev(self):
+        """
+        Wait, write 8GB to a file with vectored writes of 1GB buffers, and wait
+        """
+        time.sleep(self.spin_secs / 2)
+        with NamedTemporaryFile() as tmp:
+            _writev_all(tmp.fileno(), [_ones(1_000_000_000)] * 8)
+            os.fsync(tmp.fileno())
+        time.sleep(self.spin_secs / 2)
+        self.next(self.io_join)
+
+    @resources(memory=2000)
+    @step
+    def io_write_8gb_fdatasync(self):
+        """
+        Wait, write 8GB to a preallocated file in 1GB writes, each followed
+        by fdatasync, and wait
+        """
+        time.sleep(self.spin_secs / 2)
+        with NamedTemporaryFile() as tmp:
+            _make_file(tmp.name, 8000, chunk_size=1_000_000_000, sync="per_write_data")
+        time.sleep(self.spin_secs / 2)
+        self.next(self.io_join)
+
+    @resources(memory=2000)
+    @step
+    def io_write_sweep(self):
+        """
+        For each of SWEEP_CHUNK_SIZES: Write and fsync 8GB to a file in
+        writes of that size, and wait. Throughput in bytes per second is
+        saved in the artifact `write_throughput`
+        """
+        self.write_throughput = {}
+        for chunk_size in SWEEP_CHUNK_SIZES:
+            with NamedTemporaryFile() as tmp:
+                start = time.monotonic()
+                _make_file(tmp.name, 8000, chunk_size=chunk_size, sync="per_file")
+                rate = 8_000_000_000 / (time.monotonic() - start)
+            print(f"{chunk_size} byte writes: {rate / 1e6:.0f} MB/s")
+            self.write_throughput[chunk_size] = rate
+            time.sleep(10)
+        self.next(self.io_join)
+
     @resources(memory=2000)
     @step
     def io_write_8gb_mixed_cpu(self):
         """
         For ten times: Write 8GB to a file, spin CPU 100%
         """
-        x = b"1" * 1_000_000_000
+        num_gigs = 8
+        with NamedTemporaryFile() as tmp:
+            for _ in range(10):
+                _rewrite_file(tmp.fileno(), num_gigs * 1000)
+                spin_cpu_percentage(self.spin_secs / 10, mode=self.spin_mode)
+        self.next(self.io_join)
+
+    @resources(memory=2000)
+    @step
+    def io_write_churn(self):
+        """
+        For ten times: Write 8GB to a new file and delete it, spin CPU 100%
+        """
         for _ in range(10):
             num_gigs = 8
             with NamedTemporaryFile() as tmp:
                 _make_file(tmp.name, num_gigs * 1000)
-            spin_cpu_percentage(self.spin_secs / 10)
+            spin_cpu_percentage(self.spin_secs / 10, mode=self.spin_mode)
+        self.next(self.io_join)
+
+    @resources(memory=2000)
+    @step
+    def io_write_8gb_odirect(self):
+        """
+        Wait, write 8GB to a file bypassing the page cache, and wait
+        """
+        time.sleep(self.spin_secs / 2)
+        with NamedTemporaryFile() as tmp:
+            _make_file_direct(tmp.name, 8000)
+        time.sleep(self.spin_secs / 2)
+        self.next(self.io_join)
+
+    @pypi(packages={"liburing": "2026.3.30"})
+    @resources(memory=2000)
+    @step
+    def io_write_8gb_uring(self):
+        """
+        Wait, write 8GB to a file bypassing the page cache with io_uring, and wait
+        """
+        time.sleep(self.spin_secs / 2)
+        with NamedTemporaryFile() as tmp:
+            _make_file_uring(tmp.name, 8000)
+        time.sleep(self.spin_secs / 2)
+        self.next(self.io_join)
+
+    @resources(memory=2000)
+    @step
+    def io_copyfile_8gb(self):
+        """
+        Make a 1GB file, wait, copy it 8 times to an 8GB file in the kernel,
+        and wait
+        """
+        with NamedTemporaryFile() as src, NamedTemporaryFile() as dst:
+            _make_file(src.name, 1000)
+            time.sleep(self.spin_secs / 2)
+            _copy_file(src.name, dst.name, 8)
+        time.sleep(self.spin_secs / 2)
         self.next(self.io_join)
 
     @step
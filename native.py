@@ -0,0 +1,216 @@
+import os
+import time
+import ctypes
+from subprocess import check_call, CalledProcessError
+from tempfile import TemporaryDirectory
+
+# The C source is kept here, rather than in a .c file, so that it is shipped
+# with the Metaflow code package and compiled on the host that runs the task.
+SOURCE = r"""
+#include <stddef.h>
+#include <stdint.h>
+#include <time.h>
+#include <unistd.h>
+#if defined(__x86_64__)
+#include <immintrin.h>
+#endif
+
+static double elapsed(const struct timespec *t0)
+{
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return (t.tv_sec - t0->tv_sec) + 1e-9 * (t.tv_nsec - t0->tv_nsec);
+}
+
+/*
+ * The spin kernels run a fixed number of iterations without looking at the
+ * clock; callers calibrate them with spin_rate() to hit a target duration.
+ */
+void spin_count(uint64_t n)
+{
+    volatile uint64_t x = 0;
+    for (uint64_t i = 0; i < n; i++)
+        x++;
+}
+
+/*
+ * Write one byte to each page of [p, p + n), pacing the writes evenly over
+ * secs so that resident memory grows linearly.
+ */
+void ramp_touch(char *p, size_t n, double secs)
+{
+    struct timespec t0, ts;
+    size_t page = sysconf(_SC_PAGESIZE);
+    size_t pages = (n + page - 1) / page;
+    double ahead;
+    clock_gettime(CLOCK_MONOTONIC, &t0);
+    for (size_t i = 0; i < pages; i++) {
+        p[i * page] = 66;
+        ahead = (i + 1) * secs / pages - elapsed(&t0);
+        if (ahead > 0) {
+            ts.tv_sec = (time_t)ahead;
+            ts.tv_nsec = (long)((ahead - ts.tv_sec) * 1e9);
+            nanosleep(&ts, NULL);
+        }
+    }
+}
+
+/*
+ * The vector kernels run eight independent FMA chains so that the FMA units
+ * are not stalled on the latency of a single accumulator; the accumulators
+ * start from different values so the compiler can't merge them. Each kernel is
+ * compiled for its own target, and callers check has_*() before using it.
+ */
+#if defined(__x86_64__)
+
+#define FMA8(fmadd, a, b)         \
+    do {                          \
+        acc0 = fmadd(a, b, acc0); \
+        acc1 = fmadd(a, b, acc1); \
+        acc2 = fmadd(a, b, acc2); \
+        acc3 = fmadd(a, b, acc3); \
+        acc4 = fmadd(a, b, acc4); \
+        acc5 = fmadd(a, b, acc5); \
+        acc6 = fmadd(a, b, acc6); \
+        acc7 = fmadd(a, b, acc7); \
+    } while (0)
+
+static volatile float sink;
+
+int has_avx2(void)
+{
+    return __builtin_cpu_supports("avx2") && __builtin_cpu_supports("fma");
+}
+
+int has_avx512(void)
+{
+    return __builtin_cpu_supports("avx512f");
+}
+
+__attribute__((target("avx2,fma")))
+void spin_avx2_count(uint64_t n)
+{
+    __m256 a = _mm256_set1_ps(1.0f), b = _mm256_set1_ps(1e-7f);
+    __m256 acc0 = _mm256_set1_ps(0.0f), acc1 = _mm256_set1_ps(1.0f);
+    __m256 acc2 = _mm256_set1_ps(2.0f), acc3 = _mm256_set1_ps(3.0f);
+    __m256 acc4 = _mm256_set1_ps(4.0f), acc5 = _mm256_set1_ps(5.0f);
+    __m256 acc6 = _mm256_set1_ps(6.0f), acc7 = _mm256_set1_ps(7.0f);
+    for (uint64_t i = 0; i < n; i++)
+        FMA8(_mm256_fmadd_ps, a, b);
+    acc0 = _mm256_add_ps(_mm256_add_ps(acc0, acc1), _mm256_add_ps(acc2, acc3));
+    acc4 = _mm256_add_ps(_mm256_add_ps(acc4, acc5), _mm256_add_ps(acc6, acc7));
+    sink = _mm256_cvtss_f32(_mm256_add_ps(acc0, acc4));
+}
+
+__attribute__((target("avx512f")))
+void spin_avx512_count(uint64_t n)
+{
+    __m512 a = _mm512_set1_ps(1.0f), b = _mm512_set1_ps(1e-7f);
+    __m512 acc0 = _mm512_set1_ps(0.0f), acc1 = _mm512_set1_ps(1.0f);
+    __m512 acc2 = _mm512_set1_ps(2.0f), acc3 = _mm512_set1_ps(3.0f);
+    __m512 acc4 = _mm512_set1_ps(4.0f), acc5 = _mm512_set1_ps(5.0f);
+    __m512 acc6 = _mm512_set1_ps(6.0f), acc7 = _mm512_set1_ps(7.0f);
+    for (uint64_t i = 0; i < n; i++)
+        FMA8(_mm512_fmadd_ps, a, b);
+    acc0 = _mm512_add_ps(_mm512_add_ps(acc0, acc1), _mm512_add_ps(acc2, acc3));
+    acc4 = _mm512_add_ps(_mm512_add_ps(acc4, acc5), _mm512_add_ps(acc6, acc7));
+    sink = _mm512_reduce_add_ps(_mm512_add_ps(acc0, acc4));
+}
+
+#else
+
+int has_avx2(void) { return 0; }
+int has_avx512(void) { return 0; }
+void spin_avx2_count(uint64_t n) { spin_count(n); }
+void spin_avx512_count(uint64_t n) { spin_count(n); }
+
+#endif
+"""
+
+# spin mode -> (kernel, CPU feature check)
+SPIN_MODES = {
+    "scalar": ("spin_count", None),
+    "avx2": ("spin_avx2_count", "has_avx2"),
+    "avx512": ("spin_avx512_count", "has_avx512"),
+}
+
+# spin_rate() times the kernel until a run takes at least this long
+CALIBRATION_SECS = 0.2
+
+CFLAGS = ["-O3", "-march=native", "-shared", "-fPIC"]
+
+_lib = None
+_lib_error = None
+_rates = {}
+
+
+def load_native():
+    """
+    Compile and load the native kernels. Returns None if they can't be built,
+    e.g. when there is no C compiler on the host.
+    """
+    global _lib, _lib_error
+    if _lib is None and _lib_error is None:
+        try:
+            _lib = _build()
+        except (OSError, CalledProcessError) as ex:
+            _lib_error = str(ex)
+            print(f"Native kernels not available ({_lib_error}), using Python")
+    return _lib
+
+
+def load_spin(mode="scalar"):
+    """
+    Return the native spin kernel for `mode`, one of SPIN_MODES, or None if
+    native kernels are not available. The kernel takes an iteration count,
+    see spin_rate(). Falls back to the scalar kernel if the CPU doesn't
+    support the requested instruction set.
+    """
+    if mode not in SPIN_MODES:
+        raise ValueError(f"Unknown spin mode '{mode}', use one of {list(SPIN_MODES)}")
+    lib = load_native()
+    if lib is None:
+        return None
+    kernel, check = SPIN_MODES[mode]
+    if check and not getattr(lib, check)():
+        print(f"CPU doesn't support {mode}, using the scalar spin kernel")
+        kernel = SPIN_MODES["scalar"][0]
+    return getattr(lib, kernel)
+
+
+def spin_rate(kernel):
+    """
+    Return how many iterations per second the spin `kernel` runs on this
+    host. The measurement is cached per kernel.
+    """
+    name = kernel.__name__
+    if name not in _rates:
+        n = 1 << 20
+        while True:
+            start = time.monotonic()
+            kernel(n)
+            secs = time.monotonic() - start
+            if secs >= CALIBRATION_SECS:
+                break
+            n *= 2
+        _rates[name] = n / secs
+    return _rates[name]
+
+
+def _build():
+    cc = os.environ.get("CC", "cc")
+    with TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "native.c")
+        out = os.path.join(tmp, "native.so")
+        with open(src, "w") as f:
+            f.write(SOURCE)
+        check_call([cc] + CFLAGS + ["-o", out, src])
+        lib = ctypes.CDLL(out)
+    for kernel, check in SPIN_MODES.values():
+        getattr(lib, kernel).argtypes = [ctypes.c_uint64]
+        getattr(lib, kernel).restype = None
+        if check:
+            getattr(lib, check).restype = ctypes.c_int
+    lib.ramp_touch.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_double]
+    lib.ramp_touch.restype = None
+    return lib